@@ -8,7 +8,8 @@ CREATE TABLE IF NOT EXISTS phone_numbers (
   state_code       VARCHAR(128),
   state_name       VARCHAR(128),
   price_str        VARCHAR(50),
-  price            NUMERIC,
+  -- 整数分存储，避免 NUMERIC/浮点的解析与舍入开销，展示时再除以 100
+  price_cents      BIGINT,
   source_url       TEXT,
   source           VARCHAR(50),
   type             VARCHAR(32) NOT NULL DEFAULT 'local',
@@ -17,6 +18,24 @@ CREATE TABLE IF NOT EXISTS phone_numbers (
   UNIQUE (area_code, local_number)
 );
 
+-- 旧库在线迁移：price NUMERIC -> price_cents BIGINT（幂等，按新表结构建的库为 no-op）
+ALTER TABLE phone_numbers ADD COLUMN IF NOT EXISTS price_cents BIGINT;
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM information_schema.columns
+             WHERE table_name = 'phone_numbers' AND column_name = 'price') THEN
+    UPDATE phone_numbers
+       SET price_cents = ROUND(price * 100)::BIGINT
+     WHERE price_cents IS NULL AND price IS NOT NULL;
+    ALTER TABLE phone_numbers DROP COLUMN price;
+  END IF;
+END
+$$;
+
 -- 常用索引（可选但推荐）
 CREATE INDEX IF NOT EXISTS idx_phone_source  ON phone_numbers(source);
 CREATE INDEX IF NOT EXISTS idx_phone_state_code  ON phone_numbers(state_code);
+
+-- 历史遗留：曾为存在性预查询建过带 INCLUDE 载荷的覆盖索引，该查询已被
+-- staging 合并取代（ON CONFLICT 走表自身的 UNIQUE 约束），此处确保清理掉
+DROP INDEX IF EXISTS phone_numbers_pk_cov;
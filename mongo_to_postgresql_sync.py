@@ -1,19 +1,354 @@
-import asyncio
+import csv
+import io
 import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import re
 from urllib.parse import urlparse, parse_qs
 import sys
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 
 import psycopg2
 from psycopg2 import DatabaseError
-from psycopg2.extras import execute_values
 from pymongo import MongoClient
 
 from state_codes import normalize_state, state_name
 
 
+# -------- 纯函数热路径（无 self、无日志），便于后续用 Cython/Numba AOT 编译 --------
+
+# 每行都会用到的正则统一在模块导入时编译，绕过 re 模块的小缓存查找
+_NB_GLOBAL_RE = re.compile(r"^\+?(\d{1,3})[\s-]*(.+)$")
+
+# 删除 Latin-1 范围内所有非 0-9 字符的转换表：一次 C 级扫描，比 re.sub(r"\D", ...) 快数倍
+_NON_DIGIT_TBL = str.maketrans("", "", "".join(chr(c) for c in range(256) if not ("0" <= chr(c) <= "9")))
+
+
+def _only_digits(s: str) -> str:
+    """等价于 re.sub(r"\\D", "", s)，但走 str.translate 的单遍 C 扫描。"""
+    digits = s.translate(_NON_DIGIT_TBL)
+    # 极少数包含非 Latin-1 字符的号码走正则兜底，保持与 \D 完全一致的语义
+    if digits and not digits.isascii():
+        digits = re.sub(r"\D", "", digits)
+    return digits
+
+
+# 常见价格串（$1,234.56）里除数字和小数点外的全部字符，translate 一次剥掉
+_PRICE_STRIP_TBL = str.maketrans("", "", "$€£,+ \t\r\n")
+
+
+def _price_to_cents(price_str: str) -> Optional[int]:
+    """
+    价格字符串 -> 整数分。快路径：translate 剥掉货币符号/逗号/空白后直接 int()，
+    全程 C 实现；带单位后缀等杂质的少数串退回逐字符扫描。
+    """
+    if not price_str:
+        return None
+
+    s = price_str.translate(_PRICE_STRIP_TBL)
+    dot = s.find(".")
+    if dot < 0:
+        if s.isdigit():
+            return int(s) * 100
+    else:
+        whole, frac = s[:dot], s[dot + 1:]
+        if (not whole or whole.isdigit()) and frac.isdigit():
+            whole_cents = int(whole) * 100 if whole else 0
+            frac2 = frac[:2]
+            # 不足两位小数按十分位补齐，多余位截断
+            return whole_cents + (int(frac2) * 10 if len(frac2) == 1 else int(frac2))
+
+    return _price_to_cents_slow(price_str)
+
+
+def _price_to_cents_slow(price_str: str) -> Optional[int]:
+    """逐字符扫描兜底：跳过一切非数字字符，遇第一个小数点后最多取两位。"""
+    cents = 0
+    frac_digits = 0
+    in_fraction = False
+    seen_digit = False
+    for ch in price_str:
+        if "0" <= ch <= "9":
+            seen_digit = True
+            if in_fraction:
+                if frac_digits < 2:
+                    cents = cents * 10 + (ord(ch) - 48)
+                    frac_digits += 1
+            else:
+                cents = cents * 10 + (ord(ch) - 48)
+        elif ch == ".":
+            in_fraction = True
+
+    if not seen_digit:
+        return None
+
+    while frac_digits < 2:
+        cents *= 10
+        frac_digits += 1
+    return cents
+
+
+def _split_phone(phone: str) -> tuple[str, str, str]:
+    """拆分电话号码 -> (country_code, area_code, local_number)。仅处理常见的10位北美号码。"""
+    # 内联 translate 扫描，省掉每行一次函数调用；语义同 _only_digits
+    digits = (phone or "").translate(_NON_DIGIT_TBL)
+    if digits and not digits.isascii():
+        digits = re.sub(r"\D", "", digits)
+    if not digits:
+        return "", "", ""
+
+    country_code = "1"
+    national = digits
+
+    if len(digits) > 10:
+        national = digits[-10:]
+        country_code = digits[:-10] or "1"
+    elif len(digits) == 11 and digits.startswith("1"):
+        national = digits[1:]
+    elif len(digits) == 10:
+        national = digits
+    else:
+        return country_code, "", ""
+
+    if len(national) < 10:
+        return country_code, "", ""
+
+    return country_code, national[:3], national[3:]
+
+
+def _split_numberbarn_global(phone: str) -> tuple[str, str]:
+    """
+    对 numberbarn global 号码进行拆分，保留字母后缀。
+    期望格式: +<country_code> <local_part>，如 "+44 1806600-CAR"
+    返回 (country_code, local_part)
+    """
+    if not phone:
+        return "", ""
+    s = phone.strip()
+    m = _NB_GLOBAL_RE.match(s)
+    if m:
+        return m.group(1), m.group(2).strip()
+
+    # Fallback：全部数字时，取前三位为国家码
+    digits = _only_digits(s)
+    if len(digits) >= 4:
+        return digits[:3], s[len(digits[:3]):].lstrip()
+    return "", s
+
+
+_CATEGORIES_PREFIX = "/categories/"
+
+
+def _infer_state_from_url(url: str, collection_name: str) -> str:
+    """
+    从 URL 提取州/地区：excellentnumbers 用路径，numberbarn 用 state 参数。
+    固定格式用 str.find 切片即可，不必走正则状态机。
+    """
+    if not url:
+        return ""
+    try:
+        if collection_name == "numbers":
+            i = url.find(_CATEGORIES_PREFIX)
+            if i >= 0:
+                start = i + len(_CATEGORIES_PREFIX)
+                j = url.find("/", start)
+                if j > start:
+                    return url[start:j]
+        i = url.find("state=")
+        # 仅匹配查询参数（前一个字符是 ? 或 &），避免误截路径里的子串
+        if i > 0 and url[i - 1] in "?&":
+            start = i + 6
+            j = url.find("&", start)
+            value = url[start:j] if j >= 0 else url[start:]
+            if value:
+                return value
+    except Exception:
+        return ""
+    return ""
+
+
+def _extract_fields(doc: Dict, collection_name: str) -> Dict[str, Any]:
+    """提取 numbers 集合字段；若遇到其他集合也按 numbers 逻辑处理。"""
+    # numbers 集合里可能混有 excellentnumbers 与 numberbarn，需要根据 source 识别
+    if str(doc.get("source", "")).lower() == "numberbarn":
+        phone = doc.get("phone", "")
+        price = doc.get("price", "")
+        url = doc.get("source_url", "")
+        parsed = urlparse(url) if url else None
+        qs = parse_qs(parsed.query) if parsed else {}
+        url_type = (qs.get("type", [""])[0] or doc.get("type") or "local").lower()
+        source = "numberbarn"
+        # country: 优先 URL 参数 country，其次文档字段，缺省 USA
+        country = qs.get("country", [""])[0] or doc.get("country", "USA")
+        state = doc.get("state") or _infer_state_from_url(url, collection_name)
+        area_hint = None
+        if url_type == "global":
+            # global: 取国家码（如 +44）作为 area_hint
+            area_hint = doc.get("npa") or ""
+            if not area_hint:
+                digits = _only_digits(phone or "")
+                if len(digits) > 10:
+                    area_hint = digits[:-10] or ""
+            if not area_hint and qs.get("country"):
+                area_hint = qs.get("country", [""])[0]
+        else:
+            # tollfree/local: npa 参数优先，其次文档字段
+            area_hint = qs.get("npa", [""])[0] or doc.get("npa")
+        record_type = url_type or "local"
+    else:
+        phone = doc.get("phone", "")
+        price = doc.get("price", "")
+        url = doc.get("source_url", "")
+        source = doc.get("source", "excellent_number")
+        # excellentnumbers: URL 不含 country，保持文档或默认 USA
+        country = doc.get("country", "USA")
+        state = doc.get("region") or _infer_state_from_url(url, collection_name)
+        # excellentnumbers: URL 形如 /categories/Florida/305 -> 取最后段为 area_hint
+        area_hint = None
+        if url:
+            i = url.find(_CATEGORIES_PREFIX)
+            if i >= 0:
+                j = url.find("/", i + len(_CATEGORIES_PREFIX))
+                if j >= 0:
+                    k = j + 1
+                    end = k
+                    while end < len(url) and url[end].isalnum():
+                        end += 1
+                    if end > k:
+                        area_hint = url[k:end]
+        record_type = doc.get("type", "local")
+
+    return {
+        "phone": phone,
+        "price_str": price,
+        "source_url": url,
+        "source": source,
+        "country": country,
+        "state": state,
+        "area_code_hint": area_hint,
+        "type": record_type,
+    }
+
+
+@lru_cache(maxsize=512)
+def _cached_state(s: str) -> tuple[str, str]:
+    """州字符串 -> (code, name)；输入基本只有 ~55 种取值，缓存后每行一次哈希查找。"""
+    try:
+        code = normalize_state(s)
+        return code, state_name(code)
+    except ValueError:
+        # 未识别时返回空，让上游保持空值而非写入非法代码
+        return "", ""
+
+
+def _normalize_state_pair(state_value: Optional[str]) -> tuple[str, str]:
+    """标准化州字段，返回 (state_code, state_name)，依赖 state_codes 模块。"""
+    if not state_value:
+        return "", ""
+    s = str(state_value).strip()
+    if not s:
+        return "", ""
+    return _cached_state(s)
+
+
+def _extract_timestamp(doc: Dict[str, Any], now: Optional[datetime] = None) -> datetime:
+    """从文档里优先取时间字段，缺省用调用方传入的 now（每批取一次，避免逐行系统调用）。"""
+    for field in ("updated_at", "crawled_at", "created_at", "timestamp"):
+        ts = doc.get(field)
+        if isinstance(ts, datetime):
+            return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+    return now if now is not None else datetime.now(timezone.utc)
+
+
+# normalize_row 实际用到的字段；查询时投影，省掉无关字段的 BSON 传输与解码
+_MONGO_PROJECTION = {
+    "_id": 0,
+    "phone": 1,
+    "price": 1,
+    "source_url": 1,
+    "source": 1,
+    "state": 1,
+    "region": 1,
+    "country": 1,
+    "npa": 1,
+    "type": 1,
+    "updated_at": 1,
+    "crawled_at": 1,
+    "created_at": 1,
+    "timestamp": 1,
+}
+
+
+# COPY 的 NULL 哨兵；normalize_row 直接产出可写入 CSV 的行
+_COPY_NULL = r"\N"
+
+# 行元组的列顺序（与 staging/合并语句一致）：
+# country_code, area_code, local_number, country, state_code, state_name,
+# price_str, price_cents, source_url, source, type, updated_at
+PhoneRow = tuple
+
+
+def normalize_row(doc: Dict, collection_name: str, now: Optional[datetime] = None) -> Optional[PhoneRow]:
+    """
+    单文档标准化为 phone_numbers 行元组；无效文档返回 None。
+    纯函数（仅依赖入参与模块级常量），即热循环的全部每行工作。
+    用元组替代每行一个 10+ 键的 dict，省掉哈希表分配，且可直接喂给 csv.writer。
+    """
+    base = _extract_fields(doc, collection_name)
+    phone_raw = base["phone"]
+    if not phone_raw:
+        return None
+
+    country_code, area_code, local_number = _split_phone(phone_raw)
+    # numberbarn global 需要保留字母后缀，特殊拆分
+    if base.get("source") == "numberbarn" and (base.get("type") or "").lower() == "global":
+        cc, local_raw = _split_numberbarn_global(phone_raw)
+        if cc:
+            country_code = cc
+        if local_raw:
+            local_number = local_raw
+    # 始终使用字符串保存分段号码，避免后续写库时因数字类型或前导0丢失导致转换失败
+    area_code = str(area_code) if area_code is not None else ""
+    local_number = str(local_number) if local_number is not None else ""
+    # 优先使用文档里的区号提示（如 numberbarn 的 npa）
+    area_code = base.get("area_code_hint") or area_code
+
+    if not area_code or not local_number:
+        return None
+
+    state_code, state_name_value = _normalize_state_pair(base.get("state"))
+    price_cents = _price_to_cents(base.get("price_str", ""))
+
+    price_str = base.get("price_str")
+    source_url = base.get("source_url")
+    source = base.get("source")
+    return (
+        country_code or "1",
+        area_code,
+        local_number,
+        base.get("country") or "USA",
+        state_code,
+        state_name_value,
+        price_str if price_str is not None else _COPY_NULL,
+        price_cents if price_cents is not None else _COPY_NULL,
+        source_url if source_url is not None else _COPY_NULL,
+        source if source is not None else _COPY_NULL,
+        base.get("type") or "local",
+        _extract_timestamp(doc, now),
+    )
+
+
+# 日志监听器进程内只启动一次（多集合并发会创建多个同步器实例）
+_LOG_LISTENER: Optional[QueueListener] = None
+_LOG_SETUP_LOCK = threading.Lock()
+
+
 class MongoToPostgreSQLSync:
     """MongoDB到PostgreSQL数据同步器"""
     
@@ -31,7 +366,9 @@ class MongoToPostgreSQLSync:
                  postgres_password: str = "pP963470667",
                  
                  batch_size: int = 1000,
-                 dry_run: bool = False):
+                 dry_run: bool = False,
+                 bulk_mode: bool = False,
+                 parallel_read: int = 1):
         
         # MongoDB配置
         self.mongo_host = mongo_host
@@ -50,60 +387,60 @@ class MongoToPostgreSQLSync:
         # 同步配置
         self.batch_size = batch_size
         self.dry_run = dry_run
+        # 首次全量回灌时显式打开：临时停掉 autovacuum 和二级索引，结束后重建。
+        # 增量同步绝不要开启。
+        self.bulk_mode = bulk_mode
+        # >1 时用多线程按 skip/limit 分片并行拉取 Mongo（适合回灌，网络RTT受限场景）
+        self.parallel_read = parallel_read
         
         # 初始化连接
         self.mongo_client = None
         self.postgres_conn = None
+
+        # 未知集合的时间字段解析结果缓存（None 表示确认无时间字段）
+        self._time_field_cache: Dict[str, Optional[str]] = {}
+        # COPY 路径复用的行缓冲：每批 seek(0)+truncate() 清空，避免反复分配/释放 MB 级内存
+        self._copy_buf = io.StringIO()
         
         # 设置日志
         self.setup_logging()
     
     def setup_logging(self):
-        """设置日志配置"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.StreamHandler(sys.stdout),
-                logging.FileHandler('mongo_postgresql_sync.log')
-            ]
-        )
+        """设置日志配置：QueueHandler 入队即返回，格式化与双路 I/O 由后台线程完成"""
+        global _LOG_LISTENER
+        with _LOG_SETUP_LOCK:
+            if _LOG_LISTENER is None:
+                formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+                handlers = [
+                    logging.StreamHandler(sys.stdout),
+                    # delay=True 推迟打开文件到首条日志；轮转防止长期运行撑爆磁盘
+                    RotatingFileHandler(
+                        'mongo_postgresql_sync.log',
+                        maxBytes=10 * 1024 * 1024,
+                        backupCount=5,
+                        delay=True,
+                    ),
+                ]
+                for handler in handlers:
+                    handler.setFormatter(formatter)
+                log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+                _LOG_LISTENER = QueueListener(log_queue, *handlers, respect_handler_level=True)
+                _LOG_LISTENER.start()
+                root = logging.getLogger()
+                root.handlers[:] = [QueueHandler(log_queue)]
+                root.setLevel(logging.INFO)
         self.logger = logging.getLogger(__name__)
     
-    def price_str_to_int(self, price_str: str) -> Optional[float]:
+    def price_str_to_cents(self, price_str: str) -> Optional[int]:
         """
-        将价格字符串转换为数字，保留两位小数但**截断**而非四舍五入，
-        避免 399.995 等浮点误差被进位到 400.00。
+        将价格字符串解析为整数分（cents），单遍扫描字符，不走正则和浮点，
+        超过两位的小数**截断**而非四舍五入，避免 399.995 被进位到 400.00。
         支持格式: $1,234, $99.99, $1234, $1,234.56 等
         """
-        if not price_str:
-            return None
-
-        try:
-            from decimal import Decimal, InvalidOperation, ROUND_DOWN, getcontext
-
-            # 避免 Decimal 的上下文精度过低
-            getcontext().prec = 16
-
-            # 移除货币符号与非数字/小数点字符，避免把“$9.9/mo”解析成 9.9 以外的值
-            clean_price = re.sub(r"[^\d.,]", "", price_str)
-            if not clean_price:
-                return None
-
-            # 仅保留第一个小数点，去掉千分位逗号
-            if clean_price.count(".") > 1:
-                first, *rest = clean_price.split(".")
-                clean_price = first + "." + "".join(rest)
-            clean_price = clean_price.replace(",", "")
-
-            value = Decimal(clean_price)
-            # 截断到两位小数
-            value = value.quantize(Decimal("0.01"), rounding=ROUND_DOWN)
-            return float(value)
-
-        except (InvalidOperation, ValueError, AttributeError):
-            self.logger.warning(f"无法解析价格字符串: {price_str}")
-            return None
+        cents = _price_to_cents(price_str)
+        if cents is None and price_str:
+            self.logger.warning("无法解析价格字符串: %s", price_str)
+        return cents
     
     def connect_mongodb(self) -> bool:
         """连接MongoDB"""
@@ -112,17 +449,32 @@ class MongoToPostgreSQLSync:
                 f"mongodb://{self.mongo_user}:{self.mongo_password}"
                 f"@{self.mongo_host}:{self.mongo_port}/?authSource=admin"
             )
-            self.mongo_client = MongoClient(connection_string)
-            
-            # 测试连接
-            self.mongo_client.admin.command('ping')
-            self.logger.info(f"成功连接到MongoDB: {self.mongo_host}:{self.mongo_port}")
+            # 懒连接：不再发 ping 往返，首个真实操作即校验连通性；
+            # serverSelectionTimeoutMS 保证坏地址快速失败而非默认 30s
+            self.mongo_client = MongoClient(connection_string, serverSelectionTimeoutMS=10000)
+            self.logger.info("MongoDB客户端就绪: %s:%s", self.mongo_host, self.mongo_port)
             return True
             
         except Exception as e:
-            self.logger.error(f"MongoDB连接失败: {e}")
+            self.logger.error("MongoDB连接失败: %s", e)
             return False
     
+    # 已知集合的时间字段（与 get_recent_mongo_data 的查询分支一致）
+    _KNOWN_TIME_FIELDS = {"numbers": "crawled_at", "numberbarn_numbers": "created_at"}
+
+    def _ensure_mongo_time_indexes(self) -> None:
+        """
+        为时间范围查询的字段建降序索引（幂等，后台构建），
+        否则每天的增量查询都是全集合 COLLSCAN。
+        """
+        try:
+            db = self.mongo_client[self.mongo_db]
+            for name, field in self._KNOWN_TIME_FIELDS.items():
+                db[name].create_index([(field, -1)], background=True)
+        except Exception as e:
+            # 无建索引权限等情况不阻塞同步，只是查询退化为扫描
+            self.logger.warning("创建MongoDB时间索引失败（忽略）: %s", e)
+
     def connect_postgresql(self) -> bool:
         """连接PostgreSQL"""
         try:
@@ -135,12 +487,37 @@ class MongoToPostgreSQLSync:
             )
             with self.postgres_conn.cursor() as cur:
                 cur.execute("SELECT 1")
+            self._ensure_price_cents_column()
             self.logger.info("成功连接到 PostgreSQL: %s:%s", self.postgres_host, self.postgres_port)
             return True
         except DatabaseError as e:
             self.logger.error("PostgreSQL连接失败: %s", e)
             return False
-    
+
+    def _ensure_price_cents_column(self) -> None:
+        """
+        旧库在线迁移：price NUMERIC -> price_cents BIGINT（幂等，与 data.sql 中的迁移一致）。
+        staging 表按 LIKE phone_numbers 建表，缺 price_cents 列会让每批 COPY 直接报错，
+        所以迁移失败时让 DatabaseError 冒泡、中止本次连接。
+        """
+        migration = """
+            ALTER TABLE phone_numbers ADD COLUMN IF NOT EXISTS price_cents BIGINT;
+            DO $$
+            BEGIN
+                IF EXISTS (SELECT 1 FROM information_schema.columns
+                           WHERE table_name = 'phone_numbers' AND column_name = 'price') THEN
+                    UPDATE phone_numbers
+                       SET price_cents = ROUND(price * 100)::BIGINT
+                     WHERE price_cents IS NULL AND price IS NOT NULL;
+                    ALTER TABLE phone_numbers DROP COLUMN price;
+                END IF;
+            END
+            $$;
+        """
+        with self.postgres_conn.cursor() as cur:
+            cur.execute(migration)
+        self.postgres_conn.commit()
+
     def get_mongodb_collections(self) -> List[str]:
         """目前仅同步 numbers 集合；若不存在则回退为全部集合。"""
         try:
@@ -155,11 +532,14 @@ class MongoToPostgreSQLSync:
             return collection_names
 
         except Exception as e:
-            self.logger.error(f"获取MongoDB集合失败: {e}")
+            self.logger.error("获取MongoDB集合失败: %s", e)
             return []
     
-    def get_recent_mongo_data(self, collection_name: str, days: int = 5) -> List[Dict]:
-        """获取最近指定天数内的 MongoDB 数据（默认5天）。主要针对 numbers 集合。"""
+    def get_recent_mongo_data(self, collection_name: str, days: int = 5) -> Iterable[Dict]:
+        """
+        获取最近指定天数内的 MongoDB 数据（默认5天）。主要针对 numbers 集合。
+        返回游标按批流式消费，不再 list() 整体物化。
+        """
         try:
             db = self.mongo_client[self.mongo_db]
             collection = db[collection_name]
@@ -177,404 +557,288 @@ class MongoToPostgreSQLSync:
             elif collection_name == 'numberbarn_numbers':
                 query = {"created_at": {"$gte": start_time, "$lt": end_time}}
             else:
-                # 尝试常见的时间字段
-                time_fields = ['created_at', 'updated_at', 'crawled_at', 'timestamp']
-                for field in time_fields:
-                    try:
-                        # 检查字段是否存在
-                        sample_doc = collection.find_one({field: {"$exists": True}})
-                        if sample_doc:
-                            query = {field: {"$gte": start_time, "$lt": end_time}}
-                            break
-                    except:
-                        continue
-                
-                if not query:
-                    self.logger.warning(f"集合 {collection_name} 中未找到时间字段，获取所有数据")
+                field = self._resolve_time_field(collection_name, collection)
+                if field:
+                    query = {field: {"$gte": start_time, "$lt": end_time}}
+                else:
+                    self.logger.warning("集合 %s 中未找到时间字段，获取所有数据", collection_name)
                     query = {}
             
-            # 执行查询
-            documents = list(collection.find(query))
-            self.logger.info(f"集合 {collection_name} 最近{days}天内找到 {len(documents)} 条数据")
-            
-            return documents
-            
+            # 返回游标，由下游流式消费；batch_size 控制每次网络往返的文档数
+            if self.parallel_read > 1:
+                self.logger.info(
+                    "集合 %s 查询最近%d天数据（%d 线程并行分片）",
+                    collection_name,
+                    days,
+                    self.parallel_read,
+                )
+                return self._parallel_fetch(collection, query)
+            self.logger.info("集合 %s 查询最近%d天数据（流式游标）", collection_name, days)
+            return collection.find(query, _MONGO_PROJECTION, batch_size=2000, no_cursor_timeout=False)
+
         except Exception as e:
-            self.logger.error(f"从集合 {collection_name} 获取数据失败: {e}")
+            self.logger.error("从集合 %s 获取数据失败: %s", collection_name, e)
             return []
     
-    def normalize_mongo_data(self, documents: List[Dict], collection_name: str) -> List[Dict]:
+    # 未知集合的时间字段候选，按优先级排列
+    _TIME_FIELD_CANDIDATES = ("created_at", "updated_at", "crawled_at", "timestamp")
+
+    def _resolve_time_field(self, collection_name: str, collection) -> Optional[str]:
         """
-        标准化MongoDB数据为 phone_numbers 表的字段：
-        country_code, area_code, local_number, country, state_code, state_name, price_str, price, source_url, source, updated_at
+        解析未知集合使用的时间字段并缓存。优先看索引元数据（一次 listIndexes），
+        只有索引里没有候选字段时才退回逐字段 find_one 探测（可能是 collscan）。
         """
-        normalized: List[Dict[str, Any]] = []
-        for doc in documents:
-            base = self._extract_fields(doc, collection_name)
-            phone_raw = base["phone"]
-            if not phone_raw:
-                continue
-
-            country_code, area_code, local_number = self._split_phone(phone_raw)
-            # numberbarn global 需要保留字母后缀，特殊拆分
-            if base.get("source") == "numberbarn" and (base.get("type") or "").lower() == "global":
-                cc, local_raw = self._split_numberbarn_global(phone_raw)
-                if cc:
-                    country_code = cc
-                if local_raw:
-                    local_number = local_raw
-            # 始终使用字符串保存分段号码，避免后续写库时因数字类型或前导0丢失导致转换失败
-            area_code = str(area_code) if area_code is not None else ""
-            local_number = str(local_number) if local_number is not None else ""
-            # 优先使用文档里的区号提示（如 numberbarn 的 npa）
-            area_code = base.get("area_code_hint") or area_code
-
-            if not area_code or not local_number:
-                continue
-
-            state_code, state_name = self._normalize_state(base.get("state"))
-            price_int = self.price_str_to_int(base.get("price_str", ""))
-
-            normalized.append(
-                {
-                    "country_code": country_code or "1",
-                    "area_code": area_code,
-                    "local_number": local_number,
-                    "country": base.get("country") or "USA",
-                    "state_code": state_code,
-                    "state_name": state_name,
-                    "price_str": base.get("price_str"),
-                    "price": price_int,
-                    "source_url": base.get("source_url"),
-                    "source": base.get("source"),
-                    "type": base.get("type") or "local",
-                    "updated_at": self._extract_timestamp(doc),
-                }
-            )
+        if collection_name in self._time_field_cache:
+            return self._time_field_cache[collection_name]
 
-        self.logger.info("标准化后得到 %d 条有效记录", len(normalized))
-        return normalized
-
-    def _extract_fields(self, doc: Dict, collection_name: str) -> Dict[str, Any]:
-        """提取 numbers 集合字段；若遇到其他集合也按 numbers 逻辑处理。"""
-        if collection_name != "numbers":
-            self.logger.debug("集合 %s 也按 numbers 规则处理", collection_name)
-        # numbers 集合里可能混有 excellentnumbers 与 numberbarn，需要根据 source 识别
-        if str(doc.get("source", "")).lower() == "numberbarn":
-            phone = doc.get("phone", "")
-            price = doc.get("price", "")
-            url = doc.get("source_url", "")
-            parsed = urlparse(url) if url else None
-            qs = parse_qs(parsed.query) if parsed else {}
-            url_type = (qs.get("type", [""])[0] or doc.get("type") or "local").lower()
-            source = "numberbarn"
-            # country: 优先 URL 参数 country，其次文档字段，缺省 USA
-            country = qs.get("country", [""])[0] or doc.get("country", "USA")
-            state = doc.get("state") or self._infer_state_from_url(url, collection_name)
-            area_hint = None
-            if url_type == "global":
-                # global: 取国家码（如 +44）作为 area_hint
-                area_hint = doc.get("npa") or ""
-                if not area_hint:
-                    digits = re.sub(r"\D", "", phone or "")
-                    if len(digits) > 10:
-                        area_hint = digits[:-10] or ""
-                if not area_hint and qs.get("country"):
-                    area_hint = qs.get("country", [""])[0]
-            else:
-                # tollfree/local: npa 参数优先，其次文档字段
-                area_hint = qs.get("npa", [""])[0] or doc.get("npa")
-            record_type = url_type or "local"
-        else:
-            phone = doc.get("phone", "")
-            price = doc.get("price", "")
-            url = doc.get("source_url", "")
-            source = doc.get("source", "excellent_number")
-            # excellentnumbers: URL 不含 country，保持文档或默认 USA
-            country = doc.get("country", "USA")
-            state = doc.get("region") or self._infer_state_from_url(url, collection_name)
-            # excellentnumbers: URL 形如 /categories/Florida/305 -> 取最后段为 area_hint
-            area_hint = None
-            if url:
-                m = re.search(r"/categories/[^/]+/([0-9A-Za-z]+)", url)
-                if m:
-                    area_hint = m.group(1)
-            record_type = doc.get("type", "local")
-
-        return {
-            "phone": phone,
-            "price_str": price,
-            "source_url": url,
-            "source": source,
-            "country": country,
-            "state": state,
-            "area_code_hint": area_hint,
-            "type": record_type,
-        }
-
-    def _split_phone(self, phone: str) -> tuple[str, str, str]:
-        """拆分电话号码 -> (country_code, area_code, local_number)。仅处理常见的10位北美号码。"""
-        digits = re.sub(r"\D", "", phone or "")
-        if not digits:
-            return "", "", ""
-
-        country_code = "1"
-        national = digits
+        field = None
+        try:
+            for index in collection.list_indexes():
+                for key in index.get("key", {}):
+                    if key in self._TIME_FIELD_CANDIDATES:
+                        field = key
+                        break
+                if field:
+                    break
+        except Exception as e:
+            self.logger.debug("读取 %s 索引元数据失败: %s", collection_name, e)
 
-        if len(digits) > 10:
-            national = digits[-10:]
-            country_code = digits[:-10] or "1"
-        elif len(digits) == 11 and digits.startswith("1"):
-            national = digits[1:]
-        elif len(digits) == 10:
-            national = digits
-        else:
-            return country_code, "", ""
+        if field is None:
+            # 一次 $sample 抽样代替逐字段 find_one 探测：N 个候选字段只有一次往返
+            try:
+                sample = next(
+                    iter(collection.aggregate([
+                        {"$sample": {"size": 1}},
+                        {"$project": {f: 1 for f in self._TIME_FIELD_CANDIDATES}},
+                    ])),
+                    None,
+                )
+                if sample:
+                    for candidate in self._TIME_FIELD_CANDIDATES:
+                        if candidate in sample:
+                            field = candidate
+                            break
+            except Exception as e:
+                self.logger.debug("抽样探测 %s 时间字段失败: %s", collection_name, e)
+
+        self._time_field_cache[collection_name] = field
+        return field
+
+    def _parallel_fetch(self, collection, query: Dict, chunk: int = 10000) -> Iterator[Dict]:
+        """
+        按 _id 区间把查询切成分片并行拉取（回灌用）。
+        无排序的 skip/limit 分片之间没有稳定的全局顺序，并发写入时会互相重叠
+        甚至漏掉文档；_id 区间以值为边界，文档不会在分片间漂移，且各分片都走
+        _id 索引范围扫描，没有 skip 的 O(N) 代价。
+        """
+        # 先沿 _id 升序只取主键，每 chunk 条记一个分片下界（covered 扫描，不取整文档）
+        boundaries: List[Any] = []
+        for i, doc in enumerate(collection.find(query, {"_id": 1}).sort("_id", 1).batch_size(10000)):
+            if i % chunk == 0:
+                boundaries.append(doc["_id"])
+
+        if len(boundaries) <= 1:
+            yield from collection.find(query, _MONGO_PROJECTION, batch_size=2000)
+            return
 
-        if len(national) < 10:
-            return country_code, "", ""
+        def fetch(idx: int) -> List[Dict]:
+            bound: Dict[str, Any] = {"$gte": boundaries[idx]}
+            if idx + 1 < len(boundaries):
+                bound["$lt"] = boundaries[idx + 1]
+            # 末段开区间：边界采样后新写入的文档（ObjectId 单调递增）也会被带上
+            range_query = dict(query)
+            range_query["_id"] = bound
+            return list(collection.find(range_query, _MONGO_PROJECTION))
 
-        area_code = national[:3]
-        local_number = national[3:]
-        return country_code, area_code, local_number
+        # 滑动窗口提交：在途分片数不超过 worker 数。executor.map 会一次性提交
+        # 全部分片，消费端（COPY/合并）变慢时已完成的分片列表会无限堆积，
+        # 大回灌等于把整份结果集重新物化进内存；窗口提交让消费速度反压拉取。
+        indices = iter(range(len(boundaries)))
+        with ThreadPoolExecutor(max_workers=self.parallel_read) as executor:
+            window = deque(executor.submit(fetch, i) for i in islice(indices, self.parallel_read))
+            while window:
+                part = window.popleft().result()
+                nxt = next(indices, None)
+                if nxt is not None:
+                    window.append(executor.submit(fetch, nxt))
+                yield from part
 
-    def _split_numberbarn_global(self, phone: str) -> tuple[str, str]:
+    def normalize_mongo_data(self, documents: Iterable[Dict], collection_name: str) -> Iterator[PhoneRow]:
         """
-        对 numberbarn global 号码进行拆分，保留字母后缀。
-        期望格式: +<country_code> <local_part>，如 "+44 1806600-CAR"
-        返回 (country_code, local_part)
+        标准化MongoDB数据为 phone_numbers 表的字段（生成器，逐行产出）：
+        country_code, area_code, local_number, country, state_code, state_name, price_str, price_cents, source_url, source, updated_at
         """
-        if not phone:
-            return "", ""
-        s = phone.strip()
-        m = re.match(r"^\+?(\d{1,3})[\s-]*(.+)$", s)
-        if m:
-            return m.group(1), m.group(2).strip()
-
-        # Fallback：全部数字时，取前三位为国家码
-        digits = re.sub(r"\D", "", s)
-        if len(digits) >= 4:
-            return digits[:3], s[len(digits[:3]):].lstrip()
-        return "", s
-
-    def _infer_state_from_url(self, url: str, collection_name: str) -> str:
-        """从 URL 提取州/地区：excellentnumbers 用路径，numberbarn 用 state 参数。"""
-        if not url:
-            return ""
-        try:
-            if collection_name == "numbers":
-                m = re.search(r"/categories/([^/]+)/", url)
-                if m:
-                    return m.group(1)
-            m = re.search(r"[?&]state=([^&]+)", url)
-            if m:
-                return m.group(1)
-        except Exception:
-            return ""
-        return ""
+        # 热循环只调用模块级纯函数，避免每行的 self 属性查找与方法分发；
+        # 把函数引用绑定为局部变量，省掉每次迭代的全局查找
+        _normalize = normalize_row
+        valid = 0
+        # 缺失时间字段的文档统一打本次标准化的时间戳，省掉逐行 datetime.now 系统调用
+        now = datetime.now(timezone.utc)
+        for doc in documents:
+            row = _normalize(doc, collection_name, now)
+            if row is not None:
+                valid += 1
+                yield row
 
-    def _extract_timestamp(self, doc: Dict[str, Any]) -> datetime:
-        """从文档里优先取时间字段，缺省用当前UTC时间。"""
-        for field in ("updated_at", "crawled_at", "created_at", "timestamp"):
-            ts = doc.get(field)
-            if isinstance(ts, datetime):
-                return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
-        return datetime.now(timezone.utc)
-
-    def _normalize_state(self, state_value: Optional[str]) -> tuple[str, str]:
-        """标准化州字段，返回 (state_code, state_name)，依赖 state_codes 模块。"""
-        if not state_value:
-            return "", ""
-        s = str(state_value).strip()
-        if not s:
-            return "", ""
+        self.logger.debug("标准化后得到 %d 条有效记录", valid)
+
+    # -------- Bulk-backfill mode（仅限首次回灌）--------
+    def _enter_bulk_mode(self) -> None:
+        """回灌前：关 autovacuum、卸掉二级索引，把索引维护和 vacuum 成本推迟到结束后一次完成。"""
+        try:
+            self.postgres_conn.autocommit = True
+            with self.postgres_conn.cursor() as cur:
+                cur.execute("ALTER TABLE phone_numbers SET (autovacuum_enabled = false)")
+                cur.execute("DROP INDEX IF EXISTS idx_phone_source")
+                cur.execute("DROP INDEX IF EXISTS idx_phone_state_code")
+            self.logger.info("bulk_mode: 已关闭 autovacuum 并卸载二级索引")
+        except DatabaseError as e:
+            self.logger.warning("进入 bulk_mode 失败（继续普通模式）: %s", e)
+        finally:
+            self.postgres_conn.autocommit = False
 
+    def _exit_bulk_mode(self) -> None:
+        """回灌后：重建二级索引（CONCURRENTLY）、恢复 autovacuum 并 ANALYZE。"""
         try:
-            code = normalize_state(s)
-            return code, state_name(code)
-        except ValueError:
-            # 未识别时返回空，让上游保持空值而非写入非法代码
-            return "", ""
-
-    def insert_to_postgresql(self, data: List[Dict]) -> bool:
-        """将数据插入PostgreSQL，拆分小步骤以便维护。"""
+            self.postgres_conn.autocommit = True
+            with self.postgres_conn.cursor() as cur:
+                cur.execute(
+                    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_phone_source ON phone_numbers(source)"
+                )
+                cur.execute(
+                    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_phone_state_code ON phone_numbers(state_code)"
+                )
+                cur.execute("ALTER TABLE phone_numbers SET (autovacuum_enabled = true)")
+                cur.execute("ANALYZE phone_numbers")
+            self.logger.info("bulk_mode: 已重建索引并恢复 autovacuum")
+        except DatabaseError as e:
+            self.logger.error("退出 bulk_mode 失败，需人工检查索引/autovacuum 状态: %s", e)
+        finally:
+            self.postgres_conn.autocommit = False
+
+    def insert_to_postgresql(self, data: List[PhoneRow], manage_txn: bool = True) -> bool:
+        """
+        将一批数据插入PostgreSQL。批次切分由 sync_collection 的生产者完成，
+        这里不再二次分片。manage_txn=False 时由调用方（集合级事务 + savepoint）
+        负责提交/回滚，这里只执行语句。
+        """
         if not data:
             return True
 
         try:
             with self.postgres_conn.cursor() as cursor:
-                unique_data = self._deduplicate_input(data)
-                stats = {"inserted": 0, "updated": 0, "skipped": 0}
-
-                for batch in self._iter_batches(unique_data):
-                    existing = self._fetch_existing_records(cursor, batch)
-                    to_insert, to_update, skipped = self._classify_records(batch, existing)
-                    stats["skipped"] += skipped
-
-                    if not self.dry_run:
-                        self._insert_batch(cursor, to_insert)
-                        self._update_batch(cursor, to_update)
-
-                    stats["inserted"] += len(to_insert)
-                    stats["updated"] += len(to_update)
+                if self.dry_run:
+                    # 干运行不落库，也无法从 RETURNING 得到分类，只统计行数
+                    inserted, updated = len(data), 0
+                else:
+                    inserted, updated = self._insert_batch(cursor, data)
 
-                if not self.dry_run:
+                if not self.dry_run and manage_txn:
                     self.postgres_conn.commit()
 
                 mode = "干运行" if self.dry_run else "实际同步"
-                self.logger.info(
+                # 批次级统计降为 DEBUG，集合级汇总由 sync_collection 以 INFO 输出一次
+                self.logger.debug(
                     "%s: 插入 %d 条，更新 %d 条，跳过 %d 条",
                     mode,
-                    stats["inserted"],
-                    stats["updated"],
-                    stats["skipped"],
+                    inserted,
+                    updated,
+                    len(data) - inserted - updated,
                 )
                 return True
 
         except DatabaseError as e:
-            self.postgres_conn.rollback()
+            if manage_txn:
+                self.postgres_conn.rollback()
             # 打印具体错误栈，便于定位插入失败原因
             self.logger.exception("插入PostgreSQL失败: %s", e)
             return False
         except Exception as e:
-            self.postgres_conn.rollback()
+            if manage_txn:
+                self.postgres_conn.rollback()
             # 捕获未知异常并打印详细栈
             self.logger.exception("插入PostgreSQL时发生错误: %s", e)
             return False
 
     # -------- Helper methods for PostgreSQL upsert pipeline --------
-    def _deduplicate_input(self, data: List[Dict]) -> List[Dict]:
-        """对输入列表按 area_code+local_number 去重，保留最新 updated_at 的记录。"""
-        unique: Dict[str, Dict] = {}
-        for record in data:
-            area = record.get("area_code")
-            local = record.get("local_number")
-            if not area or not local:
-                continue
-            key = f"{area}:{local}"
-            if key not in unique or record["updated_at"] > unique[key]["updated_at"]:
-                unique[key] = record
-        if len(unique) < len(data):
-            self.logger.info("输入数据去重: %d -> %d 条记录", len(data), len(unique))
-        return list(unique.values())
-
-    def _iter_batches(self, data: List[Dict]):
-        """生成器：按 batch_size 切分批次。"""
-        for i in range(0, len(data), self.batch_size):
-            yield data[i : i + self.batch_size]
-
-    def _fetch_existing_records(self, cursor, batch: List[Dict]) -> Dict[str, tuple]:
-        """一次查询批次中已有的号码记录，键为 area_code:local_number。"""
-        keys = [(r["area_code"], r["local_number"]) for r in batch]
-        if not keys:
-            return {}
-
-        # 使用显式 VALUES 列表，避免 ANY(array) 触发 unknown 类型的哈希错误
-        values_sql = ",".join(cursor.mogrify("(%s,%s)", k).decode() for k in keys)
-        query = f"""
-            SELECT
-                area_code,
-                local_number,
-                price_str,
-                price,
-                source_url,
-                source,
-                country_code,
-                country,
-                state_code,
-                state_name,
-                type
-            FROM phone_numbers
-            WHERE (area_code, local_number) IN ({values_sql})
-        """
-        cursor.execute(query)
-        return {f"{row[0]}:{row[1]}": row for row in cursor.fetchall()}
-
-    def _classify_records(
-        self, batch: List[Dict], existing: Dict[str, tuple]
-    ) -> tuple[List[Dict], List[Dict], int]:
-        """将批次数据分为需插入、需更新和可跳过三类。"""
-        to_insert: List[Dict] = []
-        to_update: List[Dict] = []
-        skipped = 0
-
-        for record in batch:
-            key = f"{record['area_code']}:{record['local_number']}"
-            if key not in existing:
-                to_insert.append(record)
-                continue
-
-            (
-                _,
-                _,
-                price_str,
-                price,
-                source_url,
-                source,
-                existing_cc,
-                existing_country,
-                existing_state_code,
-                existing_state_name,
-                existing_type,
-            ) = existing[key]
-            if (
-                record.get("price_str") != price_str
-                or record.get("price") != price
-                or record.get("source_url") != source_url
-                or record.get("source") != source
-                or record.get("country_code") != existing_cc
-                or record.get("country") != existing_country
-                or (record.get("state_code") or "") != (existing_state_code or "")
-                or (record.get("state_name") or "") != (existing_state_name or "")
-                or (record.get("type") or "") != (existing_type or "")
-            ):
-                to_update.append(record)
-            else:
-                skipped += 1
-        return to_insert, to_update, skipped
+    # COPY 的列顺序，staging 与合并语句共用
+    _COPY_COLUMNS = (
+        "country_code", "area_code", "local_number", "country",
+        "state_code", "state_name", "price_str", "price_cents",
+        "source_url", "source", "type", "updated_at",
+    )
+    _COLS_SQL = ", ".join(_COPY_COLUMNS)
 
-    def _insert_batch(self, cursor, records: List[Dict]) -> None:
-        """批量插入新记录，使用 ON CONFLICT upsert。"""
-        if not records:
-            return
-        query = """
-            INSERT INTO phone_numbers
-            (country_code, area_code, local_number, country, state_code, state_name, price_str, price, source_url, source, type, updated_at)
-            VALUES %s
-            ON CONFLICT (area_code, local_number) DO UPDATE SET
-                country_code = EXCLUDED.country_code,
-                country = EXCLUDED.country,
-                state_code = EXCLUDED.state_code,
-                state_name = EXCLUDED.state_name,
-                price_str = EXCLUDED.price_str,
-                price = EXCLUDED.price,
-                source_url = EXCLUDED.source_url,
-                source = EXCLUDED.source,
-                type = EXCLUDED.type,
-                updated_at = EXCLUDED.updated_at
+    # SQL 在类定义时拼好一次，批次循环里不再做字符串格式化
+    _COPY_SQL = (
+        f"COPY staging_phone_numbers ({_COLS_SQL}) "
+        "FROM STDIN WITH (FORMAT CSV, NULL '\\N')"
+    )
+    _MERGE_SQL = f"""
+        INSERT INTO phone_numbers ({_COLS_SQL})
+        SELECT DISTINCT ON (area_code, local_number) {_COLS_SQL}
+        FROM staging_phone_numbers
+        ORDER BY area_code, local_number, updated_at DESC
+        ON CONFLICT (area_code, local_number) DO UPDATE SET
+            country_code = EXCLUDED.country_code,
+            country = EXCLUDED.country,
+            state_code = EXCLUDED.state_code,
+            state_name = EXCLUDED.state_name,
+            price_str = EXCLUDED.price_str,
+            price_cents = EXCLUDED.price_cents,
+            source_url = EXCLUDED.source_url,
+            source = EXCLUDED.source,
+            type = EXCLUDED.type,
+            updated_at = EXCLUDED.updated_at
+        WHERE (phone_numbers.country_code, phone_numbers.country,
+               phone_numbers.state_code, phone_numbers.state_name,
+               phone_numbers.price_str, phone_numbers.price_cents,
+               phone_numbers.source_url, phone_numbers.source,
+               phone_numbers.type)
+              IS DISTINCT FROM
+              (EXCLUDED.country_code, EXCLUDED.country,
+               EXCLUDED.state_code, EXCLUDED.state_name,
+               EXCLUDED.price_str, EXCLUDED.price_cents,
+               EXCLUDED.source_url, EXCLUDED.source,
+               EXCLUDED.type)
+        RETURNING (xmax = 0) AS inserted
+    """
+
+    def _ensure_staging_table(self, cursor) -> None:
+        """事务内创建一次 staging 临时表，事务结束自动丢弃。"""
+        cursor.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS staging_phone_numbers
+            (LIKE phone_numbers INCLUDING DEFAULTS)
+            ON COMMIT DROP
+            """
+        )
+
+    def _insert_batch(self, cursor, records: List[PhoneRow]) -> tuple[int, int]:
         """
-        values = [
-            (
-                r["country_code"],
-                r["area_code"],
-                r["local_number"],
-                r["country"],
-                r["state_code"],
-                r["state_name"],
-                r["price_str"],
-                r["price"],
-                r["source_url"],
-                r["source"],
-                r.get("type"),
-                r["updated_at"],
-            )
-            for r in records
-        ]
-        execute_values(cursor, query, values)
+        批量写入：先 COPY 进 staging 临时表（单语句、无逐行解析），
+        再一条 INSERT ... SELECT ... ON CONFLICT 合并进 phone_numbers。
+        冲突行仅在任一列有实际变化时更新（IS DISTINCT FROM 守卫），
+        统计通过 RETURNING (xmax = 0) 区分插入/更新，无需预查询。
+        返回 (inserted, updated)。
+        """
+        if not records:
+            return 0, 0
+
+        self._ensure_staging_table(cursor)
+        cursor.execute("TRUNCATE staging_phone_numbers")
+
+        buf = self._copy_buf
+        buf.seek(0)
+        buf.truncate()
+        csv.writer(buf).writerows(records)
+        buf.seek(0)
+        cursor.copy_expert(self._COPY_SQL, buf)
 
-    def _update_batch(self, cursor, records: List[Dict]) -> None:
-        """兼容接口；PostgreSQL 已在 insert 中 upsert，这里留空。"""
-        return
+        cursor.execute(self._MERGE_SQL)
+        rows = cursor.fetchall()
+        inserted = sum(1 for (is_insert,) in rows if is_insert)
+        return inserted, len(rows) - inserted
 
     def close_connections(self):
         """关闭所有连接"""
@@ -588,50 +852,153 @@ class MongoToPostgreSQLSync:
             
     def sync_collection(self, collection_name: str) -> bool:
         """同步最近5天的数据，避免长周期全量扫描"""
-        self.logger.info(f"开始同步集合: {collection_name}")
+        self.logger.info("开始同步集合: %s", collection_name)
 
         mongo_data = self.get_recent_mongo_data(collection_name, days=5)
-        if not mongo_data:
-            self.logger.info(f"{collection_name} 最近5天无数据，跳过")
-            return True
+        normalized = self.normalize_mongo_data(mongo_data, collection_name)
 
-        normalized_data = self.normalize_mongo_data(mongo_data, collection_name)
-        if not normalized_data:
-            self.logger.info(f"{collection_name} 最近5天标准化后无有效数据，跳过")
-            return True
+        # 生产者线程拉 Mongo 游标并标准化成批次，经有界队列交给主线程写库：
+        # 拉取和写入重叠，墙钟时间趋近 max(fetch, insert) 而非两者之和。
+        # 队列上限同时限定了驻留内存（PIPELINE_DEPTH 个批次）。
+        batches: "queue.Queue[Optional[List[PhoneRow]]]" = queue.Queue(maxsize=self.PIPELINE_DEPTH)
+
+        # 生产者异常经此槽位带回主线程，避免拉取中断被当作正常结束
+        producer_error: List[BaseException] = []
+
+        def produce():
+            try:
+                while True:
+                    batch = list(islice(normalized, self.batch_size))
+                    if not batch:
+                        break
+                    batches.put(batch)
+            except Exception as e:
+                producer_error.append(e)
+            finally:
+                batches.put(None)  # 结束哨兵
+
+        producer = threading.Thread(target=produce, name=f"fetch-{collection_name}", daemon=True)
+        producer.start()
 
+        # 整个集合跑在一个事务里：批次间不再各自 COMMIT fsync，
+        # 同步器可按时间窗重跑，所以关闭 synchronous_commit 是安全的。
         total_records = 0
-        for i in range(0, len(normalized_data), self.batch_size):
-            batch = normalized_data[i:i + self.batch_size]
-            if self.insert_to_postgresql(batch):
-                total_records += len(batch)
-            else:
-                self.logger.error(f"{collection_name} 最近5天批次 {i//self.batch_size + 1} 插入失败")
+        batch_no = 0
+        failed_batches = 0
+        try:
+            with self.postgres_conn.cursor() as cur:
+                cur.execute("SET LOCAL synchronous_commit = off")
+                while True:
+                    batch = batches.get()
+                    if batch is None:
+                        break
+                    batch_no += 1
+                    # savepoint 让单个坏批次只回滚自己，不拖垮整个集合
+                    cur.execute("SAVEPOINT sync_batch")
+                    if self.insert_to_postgresql(batch, manage_txn=False):
+                        cur.execute("RELEASE SAVEPOINT sync_batch")
+                        total_records += len(batch)
+                    else:
+                        cur.execute("ROLLBACK TO SAVEPOINT sync_batch")
+                        failed_batches += 1
+                        self.logger.error("%s 最近5天批次 %d 插入失败", collection_name, batch_no)
+
+            if producer_error:
+                # 游标/标准化中途失败：不提交残缺数据，按失败处理（时间窗重跑可补齐）
+                self.postgres_conn.rollback()
+                self.logger.error("%s 拉取/标准化数据中断，本集合回滚: %s", collection_name, producer_error[0])
                 return False
 
-        self.logger.info(f"{collection_name} 最近5天同步完成，处理 {total_records} 条记录")
+            if self.dry_run:
+                self.postgres_conn.rollback()
+            else:
+                self.postgres_conn.commit()
+        except DatabaseError as e:
+            self.postgres_conn.rollback()
+            self.logger.exception("%s 集合级事务失败: %s", collection_name, e)
+            return False
+        finally:
+            # 消费端提前退出时抽干队列，避免生产者阻塞在 put 上
+            while producer.is_alive():
+                try:
+                    batches.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            producer.join()
+
+        if failed_batches:
+            # 好批次已提交（时间窗重跑可补齐坏批次），但同步结果按失败上报
+            self.logger.error("%s 最近5天有 %d 个批次回滚，同步不完整", collection_name, failed_batches)
+            return False
+
+        if total_records == 0:
+            self.logger.info("%s 最近5天无有效数据", collection_name)
+        else:
+            self.logger.info("%s 最近5天同步完成，处理 %d 条记录", collection_name, total_records)
         return True
+    # 多集合并发时的最大 worker 数；Mongo 读和 PG 写都是 I/O 密集，4 足够重叠
+    MAX_COLLECTION_WORKERS = 4
+    # fetch→insert 流水线的有界队列深度（批次数）
+    PIPELINE_DEPTH = 4
+
+    def _sync_collection_worker(self, collection_name: str) -> bool:
+        """
+        在独立连接上同步单个集合，供线程池使用。
+        psycopg2 连接非线程安全，每个 worker 用自己的同步器实例。
+        """
+        worker = MongoToPostgreSQLSync(
+            mongo_host=self.mongo_host,
+            mongo_user=self.mongo_user,
+            mongo_password=self.mongo_password,
+            mongo_port=self.mongo_port,
+            mongo_db=self.mongo_db,
+            postgres_host=self.postgres_host,
+            postgres_port=self.postgres_port,
+            postgres_db=self.postgres_db,
+            postgres_user=self.postgres_user,
+            postgres_password=self.postgres_password,
+            batch_size=self.batch_size,
+            dry_run=self.dry_run,
+            parallel_read=self.parallel_read,
+        )
+        if not worker.connect_mongodb() or not worker.connect_postgresql():
+            return False
+        try:
+            return worker.sync_collection(collection_name)
+        finally:
+            worker.close_connections()
+
     def sync_all_collections(self) -> bool:
-        """同步所有集合的数据"""
+        """同步所有集合的数据；多个集合时在线程池里并发执行。"""
         self.logger.info("开始同步所有集合的数据")
-        
+
         # 获取所有集合
         collections = self.get_mongodb_collections()
         if not collections:
             self.logger.error("没有找到任何MongoDB集合")
             return False
-        
-        # 同步每个集合
+
+        # 同步每个集合：单集合走当前连接，多集合并发（两侧都是 I/O 等待，可重叠）
         success_count = 0
-        for collection_name in collections:
-            if self.sync_collection(collection_name):
+        if len(collections) == 1:
+            if self.sync_collection(collections[0]):
                 success_count += 1
             else:
-                self.logger.error(f"同步集合 {collection_name} 失败")
-        
+                self.logger.error("同步集合 %s 失败", collections[0])
+        else:
+            workers = min(self.MAX_COLLECTION_WORKERS, len(collections))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for collection_name, ok in zip(
+                    collections, executor.map(self._sync_collection_worker, collections)
+                ):
+                    if ok:
+                        success_count += 1
+                    else:
+                        self.logger.error("同步集合 %s 失败", collection_name)
+
         total_collections = len(collections)
-        self.logger.info(f"同步完成: {success_count}/{total_collections} 个集合成功")
-        
+        self.logger.info("同步完成: %d/%d 个集合成功", success_count, total_collections)
+
         return success_count == total_collections
     
     def run(self) -> bool:
@@ -645,18 +1012,27 @@ class MongoToPostgreSQLSync:
             
             if not self.connect_postgresql():
                 return False
-            
+
+            # 保证增量时间查询走索引而非 COLLSCAN
+            self._ensure_mongo_time_indexes()
+
             # 执行同步
+            if self.bulk_mode and not self.dry_run:
+                self._enter_bulk_mode()
+                try:
+                    return self.sync_all_collections()
+                finally:
+                    self._exit_bulk_mode()
             return self.sync_all_collections()
             
         except Exception as e:
-            self.logger.error(f"同步任务失败: {e}")
+            self.logger.error("同步任务失败: %s", e)
             return False
         finally:
             self.close_connections()
 
 
-async def main():
+def main():
     """主函数"""
     sync = MongoToPostgreSQLSync(
         # MongoDB配置
@@ -688,5 +1064,5 @@ async def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    # 运行主函数
-    asyncio.run(main())
+    # 运行主函数（纯同步流程，无需事件循环）
+    main()
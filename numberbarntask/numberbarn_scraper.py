@@ -1,12 +1,78 @@
 import asyncio
-import json
 import re
+import threading
+import zlib
+import orjson
+
 from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
-from pymongo import MongoClient
-from datetime import datetime
+from pymongo import MongoClient, UpdateOne
+from bson.binary import Binary
+from datetime import datetime, timezone
+
+
+
+# 旧选择器回退路径用的号码/价格正则，模块导入时编译一次
+PHONE_RE = re.compile(r"\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}")
+PRICE_RE = re.compile(r"\$[\d,]+\.?\d*")
+
+# 旧版页面结构的候选容器选择器
+_FALLBACK_SELECTOR = ".number-item, .phone-number, .listing-item, [data-phone], .search-result, .result-item"
+
+
+def _parse_numbers_from_html(html: str) -> List[Dict]:
+    """
+    从已抓取的 HTML 解析号码与价格。页面内容反正要抓下来存档，
+    直接用 lxml 在 Python 侧解析，省掉 page.evaluate 的 CDP 序列化往返。
+    """
+    soup = BeautifulSoup(html, "lxml")
+    numbers: List[Dict] = []
+
+    # 首选 numberbarn 新版组件 search-tn 结构
+    for num_el in soup.select("search-tn .tn-number"):
+        phone = num_el.get_text(strip=True)
+        if not phone:
+            continue
+        container = num_el.find_parent("search-tn")
+        price_el = container.select_one(".tn-price") if container else None
+        price = price_el.get_text(strip=True) if price_el else ""
+        numbers.append({"number": phone, "price": price})
+
+    # 兼容旧选择器（仅在新版结构无结果时回退，避免重复采集）
+    if not numbers:
+        for el in soup.select(_FALLBACK_SELECTOR):
+            text = el.get_text(" ", strip=True)
+            phones = PHONE_RE.findall(text)
+            if not phones:
+                continue
+            prices = PRICE_RE.findall(text)
+            numbers.append({"number": phones[0].strip(), "price": prices[0] if prices else ""})
+
+    return numbers
 
 
+# 单次 evaluate 内探测并点击下一页按钮：把原先 8 个选择器 × (query+状态检查)
+# 的 ~24 次 CDP 往返合并为 1 次；返回是否成功点击
+_NEXT_PAGE_JS = """
+() => {
+    const isClickable = el => el && !el.disabled && el.offsetParent !== null;
+    const cssSelectors = [
+        '[aria-label*="next"]', '[title*="next"]', '.next-page', '.pagination-next',
+    ];
+    for (const sel of cssSelectors) {
+        const el = document.querySelector(sel);
+        if (isClickable(el)) { el.click(); return true; }
+    }
+    // 文本为 '>' 的链接/按钮（原 :has-text(">") 系列选择器的等价实现）
+    for (const el of document.querySelectorAll('a, button')) {
+        if ((el.textContent || '').trim() === '>' && isClickable(el)) { el.click(); return true; }
+    }
+    return false;
+}
+"""
+
 
 class NumberbarnNumberExtractor:
     """专门用于从numberbarn.com提取号码和价格的简化爬虫"""
@@ -23,6 +89,21 @@ class NumberbarnNumberExtractor:
         self.html_collection = None
         self.error_collection = None
         
+        # 跨页/跨组合的写缓冲：攒够阈值再 bulk_write，一次冲刷摊薄round-trip。
+        # 写库经 asyncio.to_thread 走线程，缓冲需加锁
+        self._pending_ops: List[UpdateOne] = []
+        self._flush_threshold = 1000
+        self._ops_lock = threading.Lock()
+        
+        # 组合文件解析结果按文件路径缓存，进程内不重复读盘/解析
+        self._combo_cache: Dict[str, List[Dict]] = {}
+        
+        # 后台落库任务句柄：抓取不等写库返回，收尾统一等待
+        self._write_tasks: set = set()
+        
+        # 本次运行内已入库的 (号码, 价格)：重复分页/交叠搜索命中时直接跳过，不再进写缓冲
+        self._seen_numbers: set = set()
+        
         # 初始化MongoDB连接
         self.init_mongodb()
     
@@ -31,7 +112,17 @@ class NumberbarnNumberExtractor:
         try:
             connection_string = f"mongodb://extra_numbers:{self.mongo_password}@{self.mongo_host}:27017/{self.mongo_db}?authSource=extra_numbers"
             
-            self.mongo_client = MongoClient(connection_string)
+            # 连接池放宽到并发 worker 足够用；zlib 线路压缩（标准库支持，
+            # upsert 报文约减半）；超时参数保证远端异常时快速失败
+            self.mongo_client = MongoClient(
+                connection_string,
+                maxPoolSize=50,
+                minPoolSize=5,
+                compressors='zlib',
+                retryWrites=True,
+                socketTimeoutMS=30000,
+                serverSelectionTimeoutMS=5000,
+            )
             self.db = self.mongo_client[self.mongo_db]
             self.collection = self.db['numberbarn_numbers']
             self.html_collection = self.db['page_html']
@@ -41,29 +132,39 @@ class NumberbarnNumberExtractor:
             self.mongo_client.admin.command('ping')
             print(f"成功连接到MongoDB数据库: {self.mongo_db}")
             
-            # 创建索引提高查询效率
+        except Exception as e:
+            print(f"MongoDB连接失败: {e}")
+            self.mongo_client = None
+            return
+        
+        # 创建索引提高查询效率；建索引失败（如权限不足）不应作废整个连接
+        try:
             self.collection.create_index("number", unique=True)
             self.collection.create_index([("state", 1), ("npa", 1)])
             self.html_collection.create_index([("source", 1), ("url", 1)], unique=True)
             self.html_collection.create_index("fetched_at")
             self.error_collection.create_index([("source", 1), ("url", 1)], unique=True)
             self.error_collection.create_index("created_at")
-            
         except Exception as e:
-            print(f"MongoDB连接失败: {e}")
-            self.mongo_client = None
+            print(f"创建MongoDB索引失败（忽略）: {e}")
+
+    @staticmethod
+    def _compress_html(html: str) -> Binary:
+        """HTML 压缩后存 BinData：列表页普遍可压到原体积 1/8 左右，级别3平衡速度与压比。"""
+        return Binary(zlib.compress(html.encode("utf-8"), 3))
 
     def _save_html_snapshot(self, url: str, html: str, meta: Optional[Dict[str, str]] = None) -> None:
-        """将原始页面 HTML 保存到 MongoDB（source=url 唯一）。"""
+        """将原始页面 HTML 压缩保存到 MongoDB（source=url 唯一）。"""
         if self.html_collection is None or not url or not html:
             return
-        now = datetime.utcnow()
+        now = datetime.now(timezone.utc)
         try:
             self.html_collection.update_one(
                 {"source": "numberbarn", "url": url},
                 {
                     "$set": {
-                        "html": html,
+                        "html": self._compress_html(html),
+                        "html_encoding": "zlib",
                         "meta": meta or {},
                         "fetched_at": now,
                         "updated_at": now,
@@ -80,13 +181,14 @@ class NumberbarnNumberExtractor:
         if self.error_collection is None or not url or not html:
             return
 
-        now = datetime.utcnow()
+        now = datetime.now(timezone.utc)
         try:
             self.error_collection.update_one(
                 {"source": "numberbarn", "url": url},
                 {
                     "$set": {
-                        "html": html,
+                        "html": self._compress_html(html),
+                        "html_encoding": "zlib",
                         "meta": meta or {},
                         "updated_at": now,
                     },
@@ -98,7 +200,11 @@ class NumberbarnNumberExtractor:
             print(f"  [WARN] 保存 error_page_collect 失败 {url}: {exc}")
 
     def get_all_state_npa_combinations(self, json_file: str = "numberbarn_state_npa_cache.json") -> List[Dict]:
-        """从JSON文件获取所有state和npa的组合"""
+        """从JSON文件获取所有state和npa的组合（进程内按文件路径缓存）"""
+        cached = self._combo_cache.get(json_file)
+        if cached is not None:
+            return cached
+        
         combinations = []
         
         try:
@@ -110,9 +216,9 @@ class NumberbarnNumberExtractor:
                 print(f"错误：JSON文件不存在: {json_file}")
                 return []
             
-            # 读取JSON文件
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # 读取JSON文件（orjson 比标准库快数倍）
+            with open(json_file, 'rb') as f:
+                data = orjson.loads(f.read())
             
             print(f"JSON文件数据结构: {type(data)}")
             
@@ -175,71 +281,58 @@ class NumberbarnNumberExtractor:
                 for i, combo in enumerate(valid_combinations[:5]):
                     print(f"  {i+1}. {combo['state']} - {combo['npa']}")
             
+            self._combo_cache[json_file] = valid_combinations
             return valid_combinations
             
         except Exception as e:
             print(f"从JSON文件读取state-npa组合失败: {e}")
             return []
     
-    def save_numbers_to_mongodb(self, numbers: List[Dict]) -> bool:
-        """将号码列表保存到MongoDB，每个号码一条记录"""
-        if not self.mongo_client or not numbers:
-            return False
+    def _build_upsert_ops(self, numbers: List[Dict]) -> List[UpdateOne]:
+        """把号码列表转成 bulk upsert 操作。"""
+        ops = []
         
-        try:
-            current_time = datetime.utcnow()
-            inserted_count = 0
-            updated_count = 0
-            skipped_count = 0
+        for number_data in numbers:
+            number = number_data.get('number', '')
+            new_price = number_data.get('price', '')
             
-            for number_data in numbers:
-                number = number_data.get('number', '')
-                new_price = number_data.get('price', '')
-                
-                if not number:
-                    continue
-                
-                # 查询现有记录
-                existing = self.collection.find_one({'number': number})
-                
-                if existing is None:
-                    # 新记录，直接插入
-                    doc = {
-                        'number': number,
-                        'price': new_price,
-                        'state': number_data.get('state', ''),
-                        'npa': number_data.get('npa', ''),
-                        'page': number_data.get('page', 1),
-                        'source_url': number_data.get('source_url', ''),
-                        'created_at': current_time,
-                        'updated_at': current_time
-                    }
-                    try:
-                        self.collection.insert_one(doc)
-                        inserted_count += 1
-                    except Exception as e:
-                        print(f"    插入记录失败 {number}: {e}")
-                        
-                elif existing.get('price') != new_price:
-                    # 价格不同，更新记录
-                    try:
-                        self.collection.update_one(
-                            {'number': number},
-                            {'$set': {
-                                'price': new_price,
-                                'state': number_data.get('state', ''),
-                                'npa': number_data.get('npa', ''),
-                                'page': number_data.get('page', 1),
-                                'source_url': number_data.get('source_url', ''),
-                                'updated_at': current_time
-                            }}
-                        )
-                        updated_count += 1
-                    except Exception as e:
-                        print(f"    更新记录失败 {number}: {e}")
-                else:
-                    # 价格相同，跳过
-                    skipped_count += 1
+            if not number:
+                continue
+            
+            # pipeline 更新：价格未变时保留原 updated_at（等价于旧的"价格相同跳过"语义），
+            # 不存在时 $ifNull 落 created_at，一条命令覆盖插入/更新/跳过三种情况。
+            # 时间戳用服务器端 $$NOW，客户端不再逐条构造 datetime
+            ops.append(UpdateOne(
+                {'number': number},
+                [{'$set': {
+                    'updated_at': {
+                        '$cond': [{'$eq': ['$price', new_price]}, '$updated_at', '$$NOW']
+                    },
+                    'price': new_price,
+                    'state': number_data.get('state', ''),
+                    'npa': number_data.get('npa', ''),
+                    'page': number_data.get('page', 1),
+                    'source_url': number_data.get('source_url', ''),
+                    'created_at': {'$ifNull': ['$created_at', '$$NOW']},
+                }}],
+                upsert=True,
+            ))
+        
+        return ops
+
+    def _flush_pending_ops(self) -> bool:
+        """把缓冲的 upsert 一次 bulk_write 发出。"""
+        with self._ops_lock:
+            if not self._pending_ops:
+                return True
+            ops, self._pending_ops = self._pending_ops, []
+        
+        try:
+            # ordered=False：单条失败不阻塞其余操作，服务器端并行执行
+            result = self.collection.bulk_write(ops, ordered=False)
+            inserted_count = len(result.upserted_ids)
+            updated_count = result.modified_count
+            skipped_count = result.matched_count - result.modified_count
             
             print(f"  MongoDB: 插入 {inserted_count} 条新记录，更新 {updated_count} 条记录，跳过 {skipped_count} 条相同记录")
             return True
@@ -247,10 +340,32 @@ class NumberbarnNumberExtractor:
         except Exception as e:
             print(f"  MongoDB保存失败: {e}")
             return False
+
+    def save_numbers_to_mongodb(self, numbers: List[Dict]) -> bool:
+        """号码入写缓冲，攒满 _flush_threshold 条再统一 bulk_write（close 时冲刷剩余）"""
+        if not self.mongo_client or not numbers:
+            return False
+        
+        with self._ops_lock:
+            # 以 (号码, 价格) 去重：同号码价格变化仍会重新入库
+            fresh = []
+            for number_data in numbers:
+                key = (number_data.get('number', ''), number_data.get('price', ''))
+                if not key[0] or key in self._seen_numbers:
+                    continue
+                self._seen_numbers.add(key)
+                fresh.append(number_data)
+            
+            self._pending_ops.extend(self._build_upsert_ops(fresh))
+            should_flush = len(self._pending_ops) >= self._flush_threshold
+        if should_flush:
+            return self._flush_pending_ops()
+        return True
     
     def close_mongodb(self):
-        """关闭MongoDB连接"""
+        """关闭MongoDB连接（先冲刷写缓冲）"""
         if self.mongo_client:
+            self._flush_pending_ops()
             self.mongo_client.close()
             print("MongoDB连接已关闭")
     
@@ -268,7 +383,13 @@ class NumberbarnNumberExtractor:
             print(f"访问URL: {url}")
             
             await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-            await page.wait_for_timeout(3000)
+            # 等实际结果/分页节点出现，而不是盲睡3秒；无结果页超时后照常走空页分支
+            try:
+                await page.wait_for_selector(
+                    'search-tn .tn-number, .pagination', state='attached', timeout=20000
+                )
+            except Exception:
+                pass
 
             while True:
                 print(f"  正在提取第 {page_number} 页数据...")
@@ -276,42 +397,16 @@ class NumberbarnNumberExtractor:
                 # 提取当前页面的号码数据
                 # 先抓 HTML 供库存档
                 html = await page.content()
-                self._save_html_snapshot(page.url, html, meta={"state": state, "npa": npa, "page": page_number})
-
-                page_numbers = await page.evaluate("""
-                    () => {
-                        const numbers = [];
-
-                        // 首选 numberbarn 新版组件 search-tn 结构
-                        document.querySelectorAll('search-tn .tn-number').forEach(numEl => {
-                            const phone = (numEl.textContent || '').trim();
-                            if (!phone) return;
-                            const priceEl = numEl.closest('search-tn')?.querySelector('.tn-price');
-                            const price = priceEl ? (priceEl.textContent || '').trim() : '';
-                            numbers.push({ number: phone, price });
-                        });
-
-                        // 兼容旧选择器
-                        const fallbackNodes = document.querySelectorAll('.number-item, .phone-number, .listing-item, [data-phone], .search-result, .result-item');
-                        if (fallbackNodes.length) {
-                            fallbackNodes.forEach(el => {
-                                const text = el.textContent || '';
-                                const phonePattern = /(\\(\\d{3}\\)?[-.\\s]?\\d{3}[-.\\s]?\\d{4})/g;
-                                const phoneMatches = text.match(phonePattern);
-                                if (phoneMatches) {
-                                    const pricePattern = /\\$[\\d,]+\\.?\\d*/g;
-                                    const priceMatch = text.match(pricePattern);
-                                    numbers.push({
-                                        number: phoneMatches[0].trim(),
-                                        price: priceMatch ? priceMatch[0] : ''
-                                    });
-                                }
-                            });
-                        }
-
-                        return numbers;
-                    }
-                """)
+                # 写库全部转后台任务：抓取侧不等 Mongo 返回，马上解析/翻页
+                self._spawn_write(
+                    self._save_html_snapshot,
+                    page.url,
+                    html,
+                    {"state": state, "npa": npa, "page": page_number},
+                )
+
+                # HTML 已在上面抓取，直接 Python 侧解析，无需再过 CDP
+                page_numbers = _parse_numbers_from_html(html)
                 
                 # 添加state和npa信息
                 current_page_numbers = []
@@ -328,10 +423,11 @@ class NumberbarnNumberExtractor:
                 print(f"    第 {page_number} 页提取到 {len(current_page_numbers)} 个号码")
 
                 if not current_page_numbers:
-                    self._save_error_page(
+                    self._spawn_write(
+                        self._save_error_page,
                         page.url,
                         html,
-                        meta={
+                        {
                             "state": state,
                             "npa": npa,
                             "page": page_number,
@@ -348,43 +444,29 @@ class NumberbarnNumberExtractor:
                             f"州: {number.get('state', '')}, 区号: {number.get('npa', '')}"
                         )
                 
-                # 立即保存当前页数据到MongoDB
+                # 当前页数据同样后台入库
                 if current_page_numbers:
-                    self.save_numbers_to_mongodb(current_page_numbers)
+                    self._spawn_write(self.save_numbers_to_mongodb, current_page_numbers)
                 
-                # 检查是否有下一页（查找 '>' 翻页按钮）
+                # 检查是否有下一页（单次 JS 探测并点击 '>' 翻页按钮）
                 try:
-                    # 查找翻页按钮的多种可能选择器
-                    next_button_selectors = [
-                        'a:has-text(">")',
-                        'button:has-text(">")',
-                        '.pagination a:has-text(">")',
-                        '.pager a:has-text(">")',
-                        '[aria-label*="next"]',
-                        '[title*="next"]',
-                        '.next-page',
-                        '.pagination-next'
-                    ]
-                    
-                    next_button = None
-                    for selector in next_button_selectors:
-                        try:
-                            next_button = await page.query_selector(selector)
-                            if next_button:
-                                # 检查按钮是否可以点击（不是禁用状态）
-                                is_disabled = await next_button.is_disabled()
-                                is_visible = await next_button.is_visible()
-                                if not is_disabled and is_visible:
-                                    break
-                                else:
-                                    next_button = None
-                        except:
-                            continue
+                    # 记录点击前首个号码文本，翻页完成以内容变化为准
+                    prev_first = await page.evaluate(
+                        "() => document.querySelector('search-tn .tn-number')?.textContent || ''"
+                    )
+                    clicked = await page.evaluate(_NEXT_PAGE_JS)
                     
-                    if next_button:
+                    if clicked:
                         print(f"    找到下一页按钮，正在翻到第 {page_number + 1} 页...")
-                        await next_button.click()
-                        await page.wait_for_timeout(2000)  # 等待页面加载
+                        try:
+                            await page.wait_for_function(
+                                "prev => (document.querySelector('search-tn .tn-number')?.textContent || '') !== prev",
+                                arg=prev_first,
+                                timeout=15000,
+                            )
+                        except Exception:
+                            # 内容未变（可能已是末页重复渲染），退回短等待避免空转
+                            await page.wait_for_timeout(1000)
                         page_number += 1
                     else:
                         print(f"    没有找到下一页按钮，当前组合提取完成")
@@ -402,68 +484,123 @@ class NumberbarnNumberExtractor:
             print(f"提取数据失败 {url}: {e}")
             return []
     
-    async def extract_from_combinations(self, combinations: List[Dict]) -> List[Dict]:
-        """从给定的state-npa组合列表提取号码数据"""
-        all_numbers = []
+    # 并发 worker 数：共享一个浏览器进程，每个 worker 独立 BrowserContext，
+    # goto 的网络等待相互重叠；数值保守以免触发站点限流
+    MAX_CONCURRENCY = 4
+
+    # 提取号码只依赖文档与 XHR：图片/字体/媒体/样式与第三方统计脚本直接中断，
+    # 省带宽也显著缩短 goto 时间
+    _BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media", "stylesheet"})
+    _BLOCKED_URL_PARTS = ("googletagmanager", "google-analytics", "doubleclick", "facebook", "hotjar")
+
+    def _spawn_write(self, fn, *args) -> None:
+        """写库改为后台任务：抓取立即继续，任务并发度受 to_thread 线程池约束。"""
+        task = asyncio.get_running_loop().create_task(asyncio.to_thread(fn, *args))
+        self._write_tasks.add(task)
+        task.add_done_callback(self._write_tasks.discard)
+
+    async def _drain_writes(self) -> None:
+        """等待所有后台写库任务完成（异常已在各保存函数内打印处理）。"""
+        if self._write_tasks:
+            await asyncio.gather(*list(self._write_tasks), return_exceptions=True)
+
+    async def _block_nonessential(self, route):
+        """page/context 路由回调：中断与抓取无关的请求。"""
+        request = route.request
+        if request.resource_type in self._BLOCKED_RESOURCE_TYPES or any(
+            part in request.url for part in self._BLOCKED_URL_PARTS
+        ):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def extract_from_combinations(self, combinations: List[Dict]) -> Dict:
+        """
+        从给定的state-npa组合列表提取号码数据（单浏览器 + 多 context 并发）。
+        号码随提取即写入MongoDB，不在内存累积整份结果；返回汇总统计
+        {'total': 总数, 'state_stats': {州: 数量}}，长跑内存占用恒定。
+        """
+        total_count = 0
+        state_stats: Dict[str, int] = {}
+        done_count = 0
         
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=True)
-            page = await browser.new_page()
             
-            try:
-                for i, combo in enumerate(combinations):
-                    state = combo['state']
-                    npa = combo['npa']
-                    
-                    print(f"\n处理进度: {i+1}/{len(combinations)} - {state} {npa}")
-                    
-                    # 构建URL，包含更多结果和限制参数
-                    url = f"https://www.numberbarn.com/search?type=local&state={state}&npa={npa}&moreResults=true&sort=price%2B&limit=24"
-                    
-                    try:
-                        numbers = await self.extract_numbers_from_url(page, url, state, npa)
+            # 预先生成全部搜索 URL，worker 只管取现成的 (state, npa, url)
+            base = "https://www.numberbarn.com/search"
+            jobs: "asyncio.Queue[tuple]" = asyncio.Queue()
+            for combo in combinations:
+                params = {
+                    'type': 'local',
+                    'state': combo['state'],
+                    'npa': combo['npa'],
+                    'moreResults': 'true',
+                    'sort': 'price+',
+                    'limit': '24',
+                }
+                jobs.put_nowait((combo['state'], combo['npa'], f"{base}?{urlencode(params)}"))
+            
+            async def worker():
+                nonlocal done_count, total_count
+                context = await browser.new_context()
+                await context.route("**/*", self._block_nonessential)
+                page = await context.new_page()
+                try:
+                    while True:
+                        try:
+                            state, npa, url = jobs.get_nowait()
+                        except asyncio.QueueEmpty:
+                            break
                         
-                        if numbers:
-                            all_numbers.extend(numbers)
-                            print(f"  完成: 提取到 {len(numbers)} 个号码")
-                        else:
-                            print(f"  完成: 没有找到号码")
+                        done_count += 1
+                        print(f"\n处理进度: {done_count}/{len(combinations)} - {state} {npa}")
                         
-                    except Exception as e:
-                        print(f"  处理时出错: {e}")
-                    
-                    # 添加延迟避免被限制
-                    await page.wait_for_timeout(2000)
-                    
-                    # 每处理几个组合就暂停一下
-                    if i % 5 == 4:
-                        print(f"已处理 {i+1} 个组合，暂停3秒...")
-                        await page.wait_for_timeout(3000)
+                        try:
+                            numbers = await self.extract_numbers_from_url(page, url, state, npa)
+                            
+                            if numbers:
+                                total_count += len(numbers)
+                                state_stats[state] = state_stats.get(state, 0) + len(numbers)
+                                print(f"  完成: 提取到 {len(numbers)} 个号码")
+                            else:
+                                print(f"  完成: 没有找到号码")
+                            
+                        except Exception as e:
+                            print(f"  处理时出错: {e}")
                         
+                        # 添加延迟避免被限制（各 worker 独立限速）
+                        await page.wait_for_timeout(2000)
+                finally:
+                    await context.close()
+            
+            try:
+                worker_count = min(self.MAX_CONCURRENCY, max(1, len(combinations)))
+                await asyncio.gather(*(worker() for _ in range(worker_count)))
             finally:
                 await browser.close()
+                # 等后台写库收尾，保证返回时数据都已提交给 Mongo
+                await self._drain_writes()
         
-        return all_numbers
+        return {'total': total_count, 'state_stats': state_stats}
     
     async def extract_single_url(self, url: str) -> List[Dict]:
         """从单个URL提取号码数据"""
-        # 从URL中提取state和npa参数
-        import re
-        state_match = re.search(r'state=([^&]+)', url)
-        npa_match = re.search(r'npa=([^&]+)', url)
+        # 从URL查询串中提取state和npa参数（parse_qs 正确处理URL编码）
+        query = parse_qs(urlparse(url).query)
+        state = query.get('state', [''])[0]
+        npa = query.get('npa', [''])[0]
         
-        if not state_match or not npa_match:
+        if not state or not npa:
             print("无法从URL中提取state和npa参数")
             return []
         
-        state = state_match.group(1)
-        npa = npa_match.group(1)
-        
         all_numbers = []
         
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=True)
             page = await browser.new_page()
+            await page.route("**/*", self._block_nonessential)
             
             try:
                 numbers = await self.extract_numbers_from_url(page, url, state, npa)
@@ -471,6 +608,7 @@ class NumberbarnNumberExtractor:
                         
             finally:
                 await browser.close()
+                await self._drain_writes()
         
         return all_numbers
 
@@ -490,26 +628,12 @@ async def main():
         
         print(f"获取到 {len(combinations)} 个state-npa组合")
         
-        # 执行批量号码提取
-        all_numbers = await extractor.extract_from_combinations(combinations)
+        # 执行批量号码提取（数据边提取边入库，这里只拿汇总统计）
+        summary = await extractor.extract_from_combinations(combinations)
+        state_stats = summary['state_stats']
         
         print(f"\n=== 提取任务完成 ===")
-        print(f"总提取号码数: {len(all_numbers)}")
-        
-        # 打印前3条记录
-        if all_numbers:
-            print(f"\n前3条记录:")
-            for i, number in enumerate(all_numbers[:3]):
-                print(f"  {i+1}. 号码: {number.get('number', '')}, 价格: {number.get('price', '')}, 州: {number.get('state', '')}, 区号: {number.get('npa', '')}")
-        
-        # 统计各州的号码数量
-        state_stats = {}
-        for number in all_numbers:
-            state = number.get('state', 'Unknown')
-            if state not in state_stats:
-                state_stats[state] = 0
-            state_stats[state] += 1
-        
+        print(f"总提取号码数: {summary['total']}")
         print(f"覆盖州数: {len(state_stats)}")
         
         # 按号码数量排序显示前10个州
@@ -521,7 +645,7 @@ async def main():
         if len(sorted_states) > 10:
             print(f"... 还有 {len(sorted_states) - 10} 个州")
         
-        return all_numbers
+        return summary
         
     except Exception as e:
         print(f"提取任务失败: {e}")
@@ -550,15 +674,15 @@ def extract_from_single_url(url: str) -> List[Dict]:
     return asyncio.run(_extract())
 
 
-def extract_from_all_combinations(json_file: str = "numberbarn_state_npa_cache.json") -> List[Dict]:
-    """从所有state-npa组合提取号码的便捷函数"""
+def extract_from_all_combinations(json_file: str = "numberbarn_state_npa_cache.json") -> Dict:
+    """从所有state-npa组合提取号码的便捷函数（数据直接入库，返回汇总统计）"""
     """用法示例：
         from numberbarn_scraper import extract_from_all_combinations
-        numbers = asyncio.run(extract_from_all_combinations())
-        print(f"提取到 {len(numbers)} 个号码")
+        summary = extract_from_all_combinations()
+        print(f"提取到 {summary['total']} 个号码")
         
         # 或者指定特定的JSON文件
-        numbers = asyncio.run(extract_from_all_combinations("custom_combinations.json"))
+        summary = extract_from_all_combinations("custom_combinations.json")
     """
     async def _extract():
         extractor = NumberbarnNumberExtractor()